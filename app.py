@@ -4,6 +4,7 @@ from datetime import datetime
 from modules.speech_to_text import transcribe_with_diarization, detect_language_from_audio
 from modules.docx_export import export_transcription_to_docx
 from modules.azure_storage import upload_file_to_azure_storage
+from modules.batch_transcription import transcribe_with_batch
 from modules.openai_analysis import analyze_transcription
 from modules.text_cleaning import clean_segments_with_openai
 
@@ -70,15 +71,26 @@ def upload_and_transcribe():
             key="lang_override"
         )
         
+        # Batch transcription runs server-side from a blob URL and is faster for long recordings.
+        use_batch = st.checkbox(
+            "Use batch transcription (recommended for long recordings, requires Azure Blob Storage)",
+            key="use_batch"
+        )
+        
         if st.button("Start Transcription", key="transcribe_button"):
             if not st.session_state.get("temp_file_path"):
                 st.error("No file available for transcription. Please upload an audio file.")
                 return
             with st.spinner("Transcribing..."):
                 try:
-                    transcription_results = transcribe_with_diarization(
-                        st.session_state.temp_file_path, language=language_override
-                    )
+                    if use_batch:
+                        transcription_results = transcribe_with_batch(
+                            st.session_state.temp_file_path, language=language_override
+                        )
+                    else:
+                        transcription_results = transcribe_with_diarization(
+                            st.session_state.temp_file_path, language=language_override
+                        )
                     st.session_state.transcription_results = transcription_results
                     st.success("Transcription completed!")
                 except Exception as e:
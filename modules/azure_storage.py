@@ -1,6 +1,7 @@
 # modules/azure_storage.py
 import os
-from azure.storage.blob import BlobServiceClient
+from datetime import datetime, timedelta, timezone
+from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,3 +26,36 @@ def upload_file_to_azure_storage(file_path: str, container_name: str, blob_name:
         blob_client.upload_blob(data, overwrite=True)
     
     return blob_client.url
+
+def upload_file_with_sas_url(file_path: str, container_name: str, blob_name: str, expiry_hours: int = 24) -> str:
+    """
+    Uploads a file to Azure Blob Storage and returns a read-only SAS URL for the blob.
+    Used when an external service (e.g., Speech batch transcription) must fetch the blob
+    from a private container.
+    Raises a ValueError before uploading if the connection string has no account key to sign the SAS with.
+    """
+    blob_service_client = BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
+    account_key = getattr(blob_service_client.credential, "account_key", None)
+    if not account_key:
+        raise ValueError(
+            "AZURE_STORAGE_CONNECTION_STRING must contain an AccountKey to generate SAS URLs for batch transcription."
+        )
+
+    blob_url = upload_file_to_azure_storage(file_path, container_name, blob_name)
+
+    sas_token = generate_blob_sas(
+        account_name=blob_service_client.account_name,
+        container_name=container_name,
+        blob_name=blob_name,
+        account_key=account_key,
+        permission=BlobSasPermissions(read=True),
+        expiry=datetime.now(timezone.utc) + timedelta(hours=expiry_hours)
+    )
+    return f"{blob_url}?{sas_token}"
+
+def delete_blob_from_azure_storage(container_name: str, blob_name: str):
+    """
+    Deletes a blob from Azure Blob Storage.
+    """
+    blob_service_client = BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
+    blob_service_client.get_blob_client(container_name, blob_name).delete_blob()
@@ -0,0 +1,241 @@
+# modules/batch_transcription.py
+import os
+import time
+import json
+import urllib.error
+import urllib.request
+from modules.audio_utils import convert_audio_to_wav
+from modules.azure_storage import upload_file_with_sas_url, delete_blob_from_azure_storage
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SPEECH_KEY = os.getenv("SPEECH_KEY")
+SPEECH_REGION = os.getenv("SPEECH_REGION")
+# Optional override of the batch REST base URL (e.g., a local stand-in server for testing).
+SPEECH_BATCH_ENDPOINT = os.getenv("SPEECH_BATCH_ENDPOINT")
+
+class BatchTranscriptionError(RuntimeError):
+    """
+    Raised when the batch transcription API returns a non-2xx response.
+    Carries the HTTP status code and the Retry-After delay (in seconds) when the service sent one.
+    """
+    def __init__(self, message: str, status_code: int, retry_after: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code == 429 or self.status_code >= 500
+
+def get_batch_endpoint() -> str:
+    """
+    Returns the base URL of the Speech batch transcription REST API.
+    """
+    if SPEECH_BATCH_ENDPOINT:
+        return SPEECH_BATCH_ENDPOINT.rstrip("/")
+    return f"https://{SPEECH_REGION}.api.cognitive.microsoft.com/speechtotext/v3.2"
+
+def _request(method: str, url: str, body: dict = None, authenticate: bool = True, timeout: float = 60.0) -> dict:
+    """
+    Sends a request to the batch transcription API and returns the decoded JSON response.
+    The subscription key is only sent when authenticate is True; result files are pre-signed SAS URLs
+    on a different host and must be fetched without it.
+    timeout is the socket timeout in seconds, so a stalled connection cannot block forever.
+    Raises a BatchTranscriptionError with the service's error message on non-2xx responses.
+    """
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method)
+    if authenticate:
+        request.add_header("Ocp-Apim-Subscription-Key", SPEECH_KEY or "")
+    if data is not None:
+        request.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+    except urllib.error.HTTPError as e:
+        details = e.read().decode("utf-8", errors="replace")
+        try:
+            error = json.loads(details)
+            # v3.x returns {"code", "message"}; newer versions nest it under "error".
+            details = error.get("error", error).get("message", details)
+        except (ValueError, AttributeError):
+            pass
+        try:
+            retry_after = float(e.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            retry_after = None
+        raise BatchTranscriptionError(
+            f"Batch transcription request failed ({e.code}): {details or e.reason}", e.code, retry_after
+        ) from e
+    return json.loads(payload) if payload else {}
+
+def _strip_query(url: str) -> str:
+    """
+    Returns the URL without its query string (e.g., a SAS token), for matching results back to inputs.
+    """
+    return url.split("?", 1)[0]
+
+def submit_batch_transcription(content_urls, language: str = "auto", possible_languages=["ro-RO", "en-US"],
+                               max_speakers: int = 10, request_timeout: float = 60.0) -> str:
+    """
+    Submits a batch transcription job with diarization for the given blob URLs.
+    If language is "auto", the service identifies the language among possible_languages.
+    Up to max_speakers speakers are distinguished (without it the service only separates two).
+    Only the first audio channel is transcribed, since the service does not diarize multi-channel audio.
+    Returns the URL of the created transcription job.
+    """
+    properties = {
+        "diarizationEnabled": True,
+        "diarization": {"speakers": {"minCount": 1, "maxCount": max_speakers}},
+        "channels": [0],
+        "wordLevelTimestampsEnabled": False,
+        "punctuationMode": "DictatedAndAutomatic",
+        # Match the real-time path, which returns profanity unmasked.
+        "profanityFilterMode": "None"
+    }
+    if language == "auto":
+        locale = possible_languages[0]
+        properties["languageIdentification"] = {"candidateLocales": list(possible_languages)}
+    else:
+        locale = language
+
+    body = {
+        "displayName": f"batch_{time.strftime('%Y%m%d%H%M%S')}",
+        "locale": locale,
+        "contentUrls": list(content_urls),
+        "properties": properties
+    }
+    job = _request("POST", f"{get_batch_endpoint()}/transcriptions", body, timeout=request_timeout)
+    return job["self"]
+
+def wait_for_batch_transcription(job_url: str, poll_interval: float = 5.0, max_interval: float = 60.0,
+                                 backoff: float = 1.5, timeout: float = 3 * 3600,
+                                 request_timeout: float = 60.0) -> dict:
+    """
+    Polls a batch transcription job until it succeeds, increasing the delay between polls up to max_interval.
+    Throttling (429) and server errors (5xx) are retried, honoring Retry-After when present.
+    Returns the final job description.
+    Raises a RuntimeError if the job fails and a TimeoutError if it does not finish within timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    interval = poll_interval
+    while True:
+        delay = interval
+        try:
+            job = _request("GET", job_url, timeout=request_timeout)
+        except BatchTranscriptionError as e:
+            if not e.retryable:
+                raise
+            print(f"Retrying batch transcription status check: {e}")
+            if e.retry_after is not None:
+                delay = e.retry_after
+        else:
+            status = job.get("status")
+            if status == "Succeeded":
+                return job
+            if status == "Failed":
+                error = job.get("properties", {}).get("error", {})
+                raise RuntimeError(f"Batch transcription failed: {error.get('message', 'unknown error')}")
+        now = time.monotonic()
+        if now >= deadline:
+            raise TimeoutError(f"Batch transcription did not finish within {timeout} seconds.")
+        time.sleep(min(delay, deadline - now))
+        interval = min(interval * backoff, max_interval)
+
+def parse_batch_transcription(result: dict):
+    """
+    Converts a batch transcription result file into the segment format used by transcribe_with_diarization.
+    Offsets and durations are returned in ticks (100 ns), like the Speech SDK.
+    Only phrases from channel 0 are kept; other channels would duplicate them without speaker labels.
+    """
+    segments = []
+    for phrase in result.get("recognizedPhrases", []):
+        if phrase.get("recognitionStatus", "Success") != "Success" or not phrase.get("nBest"):
+            continue
+        if phrase.get("channel", 0) != 0:
+            continue
+        speaker = phrase.get("speaker")
+        segments.append({
+            # The real-time ConversationTranscriber labels speakers "Guest-1", "Guest-2", ...
+            "speaker_id": f"Guest-{speaker}" if speaker is not None else "Unknown",
+            "text": phrase["nBest"][0].get("display", ""),
+            "offset": phrase.get("offsetInTicks", 0),
+            "duration": phrase.get("durationInTicks", 0)
+        })
+    segments.sort(key=lambda seg: seg["offset"])
+    return segments
+
+def fetch_batch_transcription_results(job_url: str, content_urls=(), request_timeout: float = 60.0):
+    """
+    Downloads the results of a finished batch transcription job.
+    Returns a dict mapping each source URL to its list of segments. Sources are matched back to the
+    given content_urls ignoring query strings (the service may strip or reorder SAS tokens);
+    unmatched results are keyed by the service's "source" value.
+    """
+    inputs = {_strip_query(url): url for url in content_urls}
+    results = {}
+    files_url = f"{job_url}/files"
+    while files_url:
+        page = _request("GET", files_url, timeout=request_timeout)
+        for item in page.get("values", []):
+            if item.get("kind") != "Transcription":
+                continue
+            result = _request("GET", item["links"]["contentUrl"], authenticate=False, timeout=request_timeout)
+            source = result.get("source", item.get("name", ""))
+            results[inputs.get(_strip_query(source), source)] = parse_batch_transcription(result)
+        files_url = page.get("@nextLink")
+    return results
+
+def delete_batch_transcription(job_url: str, request_timeout: float = 60.0):
+    """
+    Deletes a batch transcription job (and its result files) from the Speech resource.
+    """
+    try:
+        _request("DELETE", job_url, timeout=request_timeout)
+    except Exception as e:
+        print(f"Could not delete batch transcription job: {e}")
+
+def transcribe_urls_with_batch(content_urls, language: str = "auto", max_speakers: int = 10,
+                               request_timeout: float = 60.0, **poll_options):
+    """
+    Transcribes several already-uploaded audio files in a single batch job, processed in parallel server-side.
+    Returns a dict mapping each content URL to its list of segments (see fetch_batch_transcription_results).
+    The job is always deleted afterwards, whether it succeeded or not.
+    request_timeout is the socket timeout in seconds for each REST call.
+    """
+    content_urls = list(content_urls)
+    job_url = submit_batch_transcription(
+        content_urls, language=language, max_speakers=max_speakers, request_timeout=request_timeout
+    )
+    try:
+        wait_for_batch_transcription(job_url, request_timeout=request_timeout, **poll_options)
+        return fetch_batch_transcription_results(job_url, content_urls, request_timeout=request_timeout)
+    finally:
+        delete_batch_transcription(job_url, request_timeout=request_timeout)
+
+def transcribe_with_batch(file_path: str, language: str = "auto", container_name: str = "transcription", **options):
+    """
+    Transcribes a (long) audio file using Azure Speech batch transcription instead of a real-time session.
+    Like the real-time path, MP3s are first converted to 16 kHz mono WAV (mono so the service can diarize).
+    The file is uploaded to Azure Blob Storage first, the job references the blob URL, and the blob is
+    deleted again once the job is done.
+    Returns a list of dictionaries with transcription results, like transcribe_with_diarization.
+    """
+    file_path = convert_audio_to_wav(file_path)
+    blob_name = f"{time.strftime('%Y%m%d%H%M%S')}_{os.path.basename(file_path)}"
+    content_url = upload_file_with_sas_url(file_path, container_name=container_name, blob_name=blob_name)
+    try:
+        results = transcribe_urls_with_batch([content_url], language=language, **options)
+    finally:
+        try:
+            delete_blob_from_azure_storage(container_name, blob_name)
+        except Exception as e:
+            print(f"Could not delete uploaded audio blob: {e}")
+
+    if not results:
+        # E.g., the service could not fetch the audio and only produced a report file.
+        raise RuntimeError("Batch transcription produced no transcription for the audio file.")
+    # A single-file job yields exactly one result file.
+    return results.get(content_url, next(iter(results.values())))
@@ -0,0 +1,211 @@
+# tests/test_batch_transcription.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from modules import batch_transcription
+
+RESULT = {
+    "source": "https://storage.example/transcription/a.wav",
+    "recognizedPhrases": [
+        {"recognitionStatus": "Success", "speaker": 2, "offsetInTicks": 50, "durationInTicks": 5,
+         "nBest": [{"display": "Second."}]},
+        {"recognitionStatus": "NoMatch", "offsetInTicks": 20, "durationInTicks": 5},
+        {"recognitionStatus": "Success", "speaker": 1, "offsetInTicks": 10, "durationInTicks": 5,
+         "nBest": [{"display": "First."}]}
+    ]
+}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for the Speech batch transcription REST API.
+    """
+    def log_message(self, *args):
+        pass
+
+    def _send(self, obj, code=200, headers=None):
+        payload = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _record(self):
+        state = self.server.state
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        state["requests"].append((self.command, self.path, self.headers.get("Ocp-Apim-Subscription-Key"), body))
+        return state
+
+    def do_POST(self):
+        state = self._record()
+        if state.get("reject"):
+            self._send({"code": "InvalidPayload", "message": "Unsupported locale."}, 400)
+        else:
+            self._send({"self": f"{state['base']}/api/transcriptions/1"}, 201)
+
+    def do_DELETE(self):
+        self._record()
+        self.send_response(204)
+        self.end_headers()
+
+    def do_GET(self):
+        state = self._record()
+        base = state["base"]
+        if self.path == "/api/transcriptions/1":
+            status = state["statuses"].pop(0) if len(state["statuses"]) > 1 else state["statuses"][0]
+            if "code" in status:
+                self._send({"code": "TooManyRequests", "message": "Throttled."}, status["code"],
+                           {"Retry-After": status["retry_after"]})
+            else:
+                self._send(status)
+        elif self.path in state["files"]:
+            page = state["files"][self.path]
+            self._send({**page, "values": [
+                {**item, "links": {"contentUrl": base + item["links"]["contentUrl"]}} for item in page["values"]
+            ]})
+        elif self.path.split("?", 1)[0] in state["results"]:
+            self._send(state["results"][self.path.split("?", 1)[0]])
+        else:
+            self._send({}, 404)
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), StandInHandler)
+    base = f"http://127.0.0.1:{server.server_port}"
+    server.state = {
+        "base": base,
+        "requests": [],
+        "statuses": [{"status": "Running"}, {"status": "Succeeded"}],
+        "files": {"/api/transcriptions/1/files": {"values": [
+            {"kind": "TranscriptionReport", "links": {"contentUrl": "/results/report.json"}},
+            {"kind": "Transcription", "links": {"contentUrl": "/results/a.json?sig=secret"}}
+        ]}},
+        "results": {"/results/a.json": RESULT}
+    }
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(batch_transcription, "SPEECH_BATCH_ENDPOINT", f"{base}/api")
+    monkeypatch.setattr(batch_transcription, "SPEECH_KEY", "test-key")
+    yield server.state
+    server.shutdown()
+    server.server_close()
+
+def test_batch_transcription_round_trip(stand_in):
+    content_url = "https://storage.example/transcription/a.wav?sv=2024&sig=abc"
+    results = batch_transcription.transcribe_urls_with_batch(
+        [content_url], language="ro-RO", max_speakers=4, poll_interval=0.01
+    )
+
+    assert results == {content_url: [
+        {"speaker_id": "Guest-1", "text": "First.", "offset": 10, "duration": 5},
+        {"speaker_id": "Guest-2", "text": "Second.", "offset": 50, "duration": 5}
+    ]}
+
+    requests = stand_in["requests"]
+    method, path, _, body = requests[0]
+    assert (method, path) == ("POST", "/api/transcriptions")
+    assert body["locale"] == "ro-RO"
+    assert body["contentUrls"] == [content_url]
+    assert body["properties"]["diarization"] == {"speakers": {"minCount": 1, "maxCount": 4}}
+    assert body["properties"]["channels"] == [0]
+    assert [r[1] for r in requests].count("/api/transcriptions/1") == 3  # Two polls and the delete.
+    assert requests[-1][:2] == ("DELETE", "/api/transcriptions/1")
+
+    for _, path, key, _ in requests:
+        if path.startswith("/results/"):
+            assert key is None  # The Speech key must never reach SAS result URLs.
+        else:
+            assert key == "test-key"
+
+def test_failed_job_raises_and_is_deleted(stand_in):
+    stand_in["statuses"] = [{"status": "Failed", "properties": {"error": {"message": "Audio not reachable."}}}]
+    with pytest.raises(RuntimeError, match="Audio not reachable."):
+        batch_transcription.transcribe_urls_with_batch(["https://storage.example/a.wav"], poll_interval=0.01)
+    assert stand_in["requests"][-1][:2] == ("DELETE", "/api/transcriptions/1")
+
+def test_timeout_raises_and_is_deleted(stand_in):
+    stand_in["statuses"] = [{"status": "Running"}]
+    with pytest.raises(TimeoutError):
+        batch_transcription.transcribe_urls_with_batch(
+            ["https://storage.example/a.wav"], poll_interval=0.01, timeout=0.05
+        )
+    polls = [r for r in stand_in["requests"] if r[:2] == ("GET", "/api/transcriptions/1")]
+    assert len(polls) > 1  # Keeps polling until the deadline has actually passed.
+    assert stand_in["requests"][-1][:2] == ("DELETE", "/api/transcriptions/1")
+
+def test_http_error_includes_service_message(stand_in):
+    stand_in["reject"] = True
+    with pytest.raises(RuntimeError, match=r"\(400\): Unsupported locale\."):
+        batch_transcription.submit_batch_transcription(["https://storage.example/a.wav"])
+
+def test_throttled_poll_is_retried(stand_in):
+    stand_in["statuses"] = [{"code": 429, "retry_after": "0"}, {"code": 503, "retry_after": "0"}, {"status": "Succeeded"}]
+    results = batch_transcription.transcribe_urls_with_batch(["https://storage.example/a.wav"], poll_interval=0.01)
+    assert len(next(iter(results.values()))) == 2
+    polls = [r for r in stand_in["requests"] if r[:2] == ("GET", "/api/transcriptions/1")]
+    assert len(polls) == 3
+
+def test_only_first_channel_is_kept():
+    result = {"recognizedPhrases": [
+        {"channel": 0, "speaker": 1, "offsetInTicks": 10, "durationInTicks": 5, "nBest": [{"display": "Hello."}]},
+        {"channel": 1, "offsetInTicks": 10, "durationInTicks": 5, "nBest": [{"display": "Hello."}]}
+    ]}
+    assert batch_transcription.parse_batch_transcription(result) == [
+        {"speaker_id": "Guest-1", "text": "Hello.", "offset": 10, "duration": 5}
+    ]
+
+def test_files_listing_follows_next_link(stand_in):
+    base = stand_in["base"]
+    stand_in["files"] = {
+        "/api/transcriptions/1/files": {
+            "values": [{"kind": "Transcription", "links": {"contentUrl": "/results/a.json"}}],
+            "@nextLink": f"{base}/api/transcriptions/1/files?skip=1"
+        },
+        "/api/transcriptions/1/files?skip=1": {
+            "values": [{"kind": "Transcription", "links": {"contentUrl": "/results/b.json"}}]
+        }
+    }
+    stand_in["results"]["/results/b.json"] = {**RESULT, "source": "https://storage.example/transcription/b.wav"}
+    urls = ["https://storage.example/transcription/a.wav?sig=1", "https://storage.example/transcription/b.wav?sig=2"]
+    results = batch_transcription.transcribe_urls_with_batch(urls, poll_interval=0.01)
+    assert sorted(results) == sorted(urls)
+
+@pytest.fixture
+def blob_storage(monkeypatch):
+    blobs = {"uploaded": [], "deleted": []}
+
+    def upload(file_path, container_name, blob_name):
+        blobs["uploaded"].append(blob_name)
+        return f"https://storage.example/{container_name}/{blob_name}?sig=abc"
+
+    def delete(container_name, blob_name):
+        blobs["deleted"].append(blob_name)
+
+    monkeypatch.setattr(batch_transcription, "upload_file_with_sas_url", upload)
+    monkeypatch.setattr(batch_transcription, "delete_blob_from_azure_storage", delete)
+    return blobs
+
+def test_transcribe_with_batch_uploads_and_deletes_blob(stand_in, blob_storage, monkeypatch):
+    # MP3s are converted to mono WAV first, like the real-time path.
+    monkeypatch.setattr(batch_transcription, "convert_audio_to_wav", lambda path: path.replace(".mp3", ".wav"))
+    # The result's source does not match the uploaded blob name, so the single-result fallback is used.
+    segments = batch_transcription.transcribe_with_batch("meeting.mp3", language="ro-RO", poll_interval=0.01)
+    assert [seg["text"] for seg in segments] == ["First.", "Second."]
+    assert len(blob_storage["uploaded"]) == 1
+    assert blob_storage["uploaded"][0].endswith("_meeting.wav")
+    assert blob_storage["deleted"] == blob_storage["uploaded"]
+
+def test_transcribe_with_batch_without_transcription_file(stand_in, blob_storage):
+    stand_in["files"]["/api/transcriptions/1/files"] = {"values": [
+        {"kind": "TranscriptionReport", "links": {"contentUrl": "/results/report.json"}}
+    ]}
+    with pytest.raises(RuntimeError, match="produced no transcription"):
+        batch_transcription.transcribe_with_batch("meeting.wav", poll_interval=0.01)
+    assert blob_storage["deleted"] == blob_storage["uploaded"]
+    assert stand_in["requests"][-1][:2] == ("DELETE", "/api/transcriptions/1")